@@ -1,67 +1,170 @@
+import numpy as np
 import pandas as pd
 import re
 
-def split_zone_data_x(df: pd.DataFrame) -> pd.DataFrame:
-    area_col = [col for col in df.columns if re.search(r'AREA\d+', col)]
-    other_col = [col for col in df.columns if col not in area_col]
+try:
+    import polars as pl
+except ImportError:
+    pl = None
 
-    if not area_col:
-        print("无AREA相关列")
-        return df
-    
-    print(f"找到{len(area_col)}个AREA相关列，开始划分ZONE")
+_AREA_RE = re.compile(r'AREA\d+')
+_TRAIL_NUM_RE = re.compile(r'_\d+$')
+_AREA_NUM_RE = re.compile(r'AREA(\d+)')
+_ENGINES = ('pandas', 'polars')
+_UINT8_MAX = np.iinfo(np.uint8).max
 
-    metrics = set()
+def _group_metric_cols(area_col: list) -> dict:
+    # 按指标名一次性归组AREA列（dict保持插入顺序并去重）
+    buckets = {}
 
     for col in area_col:
-        metric = re.sub(r'_\d+$', '', col)
-        metric = re.sub(r'AREA\d+', '', metric).replace('__', '_')
-        metrics.append(metric)
+        metric = _TRAIL_NUM_RE.sub('', col)
+        metric = _AREA_RE.sub('', metric).replace('__', '_')
+        buckets.setdefault(metric, []).append(col)
 
-    dfs_to_concat = []
+    ab_prs_cols = [col for col in area_col if 'AB_PRS' in col and 'IL' not in col]
+    ab_prs_by_polish = {}
 
-    for metric in metrics:
+    metric_cols_map = {}
+
+    for metric, bucket_cols in buckets.items():
         metric_find = metric.split('_')
         metric_polish = metric_find[0] if metric_find else ''
         metric_para = metric[len(metric_polish) + 1:] if len(metric_polish) > 0 else metric
 
         if 'AB_PRS' in metric_para:
-            metric_cols = [col for col in area_col if metric_polish in col and 'AB_PRS' in col and 'IL' not in col]
+            # 同一polish下的AB_PRS指标共用一次筛选结果
+            if metric_polish not in ab_prs_by_polish:
+                ab_prs_by_polish[metric_polish] = [col for col in ab_prs_cols if metric_polish in col]
+            metric_cols = ab_prs_by_polish[metric_polish]
         else:
-            metric_cols = [col for col in area_col if metric_polish in col and metric_para in col]
+            metric_cols = bucket_cols
+
+        if metric_cols:
+            metric_cols_map[metric] = metric_cols
+
+    return metric_cols_map
+
+def _area_col_map(metric_cols_map: dict) -> list:
+    # 列名 -> (指标, AREA) 映射表，同一列可能属于多个指标（AB_PRS）
+    col_to_area = {
+        col: int(_AREA_NUM_RE.search(col).group(1))
+        for metric_cols in metric_cols_map.values()
+        for col in metric_cols
+    }
+    return [
+        (col, metric, col_to_area[col])
+        for metric, metric_cols in metric_cols_map.items()
+        for col in metric_cols
+    ]
+
+def _area_fits_uint8(col_map: list) -> bool:
+    # AREA编号超过255时不能用uint8，否则会回绕（pandas）或报错（polars），改用int64
+    return max(area for _, _, area in col_map) <= _UINT8_MAX
+
+def _melt_area_data_pandas(df: pd.DataFrame, metric_cols_map: dict) -> pd.DataFrame:
+    col_map = _area_col_map(metric_cols_map)
+    mapping = pd.DataFrame(col_map, columns=['original_col', 'metric', 'AREA'])
+    mapping['AREA'] = mapping['AREA'].astype(np.uint8 if _area_fits_uint8(col_map) else np.int64)
+    value_cols = mapping['original_col'].unique().tolist()
+
+    # 单次melt + 映射表连接后透视，替代逐指标melt与concat
+    # 以源数据的行号作为透视键，WAFER_ID重复的行各自保留，不会被合并
+    melted = df[value_cols].set_axis(pd.RangeIndex(len(df), name='_row')).reset_index().melt(
+        id_vars=['_row'],
+        var_name='original_col',
+        value_name='value'
+    )
+    melted = melted.merge(mapping, on='original_col', how='inner')
+
+    # unstack会按索引排序，再按melt中首次出现的顺序还原
+    row_order = pd.MultiIndex.from_frame(melted[['_row', 'AREA']].drop_duplicates())
+    area_data = (
+        melted.groupby(['_row', 'AREA', 'metric'], sort=False)['value']
+        .first()
+        .unstack('metric')
+        .reindex(index=row_order, columns=list(metric_cols_map))
+    )
+    area_data.columns.name = None
+    area_data = area_data.reset_index()
+    area_data.insert(0, 'WAFER_ID', df['WAFER_ID'].iloc[area_data.pop('_row')].reset_index(drop=True))
+
+    return area_data
+
+def _melt_area_data_polars(df: pd.DataFrame, metric_cols_map: dict) -> pd.DataFrame:
+    if pl is None:
+        raise ImportError("engine='polars' 需要安装polars")
+
+    col_map = _area_col_map(metric_cols_map)
+    area_dtype = pl.UInt8 if _area_fits_uint8(col_map) else pl.Int64
+    mapping = pl.LazyFrame(
+        col_map,
+        schema={'original_col': pl.String, 'metric': pl.String, 'AREA': area_dtype},
+        orient='row'
+    )
+    value_cols = list(dict.fromkeys(col for col, _, _ in col_map))
 
-        if not metric_cols:
-            continue
+    # 单次unpivot + 映射表连接，替代逐指标melt与concat
+    # 与pandas引擎一致：以源数据的行号作为透视键，同一格取第一个非空值
+    long_data = (
+        pl.from_pandas(df[value_cols])
+        .lazy()
+        .with_row_index('_row')
+        .unpivot(index='_row', on=value_cols, variable_name='original_col', value_name='value')
+        .join(mapping, on='original_col', how='inner')
+        .collect()
+    )
+    area_data = long_data.pivot(
+        on='metric',
+        index=['_row', 'AREA'],
+        values='value',
+        aggregate_function=pl.element().drop_nulls().first()
+    )
 
-        melted = df[metric_cols + ['WAFER_ID']].melt(
-            id_vars=["WAFER_ID"],
-            var_name='original_col',
-            value_name=metric
-        )
+    area_data = area_data.select(['_row', 'AREA', *metric_cols_map]).to_pandas()
+    area_data.insert(0, 'WAFER_ID', df['WAFER_ID'].iloc[area_data.pop('_row')].reset_index(drop=True))
 
-        melted['AREA'] = melted['original_col'].str.extract(r'AREA(\d+)').astype(int)
+    return area_data
 
-        melted = melted.set_index(['WAFER_ID', 'AREA'])[[metric]]
+def _downcast_floats(df: pd.DataFrame) -> pd.DataFrame:
+    # float64 -> float32，超出float32范围的列保持不变
+    f32_max = np.finfo(np.float32).max
+    float_cols = df.select_dtypes('float64').columns
+    cast_cols = {col: np.float32 for col in float_cols if not (df[col].abs() > f32_max).any()}
+    return df.astype(cast_cols) if cast_cols else df
 
-        dfs_to_concat.append(melted)
-    
-    if not dfs_to_concat:
+def split_zone_data_x(df: pd.DataFrame, engine: str = 'pandas') -> pd.DataFrame:
+    if engine not in _ENGINES:
+        raise ValueError(f"未知的engine: {engine!r}，可选 {_ENGINES}")
+
+    area_col = [col for col in df.columns if _AREA_RE.search(col)]
+    area_col_set = set(area_col)
+    other_col = [col for col in df.columns if col not in area_col_set]
+
+    if not area_col:
+        print("无AREA相关列")
+        return df
+
+    print(f"找到{len(area_col)}个AREA相关列，开始划分ZONE")
+
+    metric_cols_map = _group_metric_cols(area_col)
+
+    if not metric_cols_map:
         print("划分失败")
         return df
-    
-    try:
-        area_data = pd.concat(dfs_to_concat, axis=1).reset_index()
-    except Exception as e:
-        dfs_clean = [d.copy() for d in dfs_to_concat]
-        area_data = pd.concat(dfs_clean, axis=1).reset_index()
-
-    other_data = df[other_col].copy()
-    df = pd.merge(area_data, other_data, on=["WAFER_ID"], how="inner")
-
-    for i in range(1,9):
-        df[f'AREA{i}'] = 0
-
-    for i in range(1,9):
-        df.loc[df["AREA"] == i, f'AREA{i}'] = 1
-    
+
+    if engine == 'polars':
+        area_data = _melt_area_data_polars(df, metric_cols_map)
+    else:
+        area_data = _melt_area_data_pandas(df, metric_cols_map)
+
+    # 缩小数值类型，减少后续连接的内存带宽
+    area_data = _downcast_floats(area_data)
+
+    df = pd.merge(area_data, df[other_col], on="WAFER_ID", how="inner")
+
+    area_vals = df["AREA"].to_numpy()
+    one_hot = np.equal.outer(area_vals, np.arange(1, 9, dtype=area_vals.dtype)).astype(np.int8)
+    df[[f'AREA{i}' for i in range(1,9)]] = one_hot
+
     return df
@@ -0,0 +1,246 @@
+"""原始测量值解析 - 将逗号等分隔的原始值字符串按行求均值"""
+import re
+import numpy as np
+import pandas as pd
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+_RAW_SEP_RE = re.compile(r'[,;\s]+')
+
+# 10的0~22次幂均可由float64精确表示，整数尾数与其相乘/相除的结果与float()一致（正确舍入）
+_POW10 = np.array([10.0 ** i for i in range(23)])
+_MAX_EXACT_MANTISSA = 2 ** 53
+
+
+def _mean_of_raw_text(text: str) -> float:
+    """
+    按float()语义解析单行原始值并求均值（与np.mean一致）
+
+    分隔符为逗号、分号和空白，空片段忽略；任一片段无法解析时返回NaN。
+
+    Args:
+        text: 原始值字符串
+
+    Returns:
+        均值，无有效值或含非法片段时为NaN
+    """
+    try:
+        values = [float(token) for token in _RAW_SEP_RE.split(text) if token]
+    except ValueError:
+        return np.nan
+    return float(np.mean(values)) if values else np.nan
+
+
+def _block_sum(values: np.ndarray, lo: int, n: int) -> float:
+    # numpy成对求和的叶子块（n <= 128）：少于8个顺序累加，否则8路累加后两两合并
+    if n < 8:
+        res = 0.0
+        for i in range(lo, lo + n):
+            res += values[i]
+        return res
+    r0 = values[lo]
+    r1 = values[lo + 1]
+    r2 = values[lo + 2]
+    r3 = values[lo + 3]
+    r4 = values[lo + 4]
+    r5 = values[lo + 5]
+    r6 = values[lo + 6]
+    r7 = values[lo + 7]
+    i = 8
+    while i < n - n % 8:
+        r0 += values[lo + i]
+        r1 += values[lo + i + 1]
+        r2 += values[lo + i + 2]
+        r3 += values[lo + i + 3]
+        r4 += values[lo + i + 4]
+        r5 += values[lo + i + 5]
+        r6 += values[lo + i + 6]
+        r7 += values[lo + i + 7]
+        i += 8
+    res = ((r0 + r1) + (r2 + r3)) + ((r4 + r5) + (r6 + r7))
+    while i < n:
+        res += values[lo + i]
+        i += 1
+    return res
+
+
+def _pairwise_sum(values: np.ndarray, n: int) -> float:
+    """
+    与numpy的add.reduce相同的成对求和，保证均值与np.mean逐位一致
+
+    超过128个元素时按numpy的方式二分（左半长度取8的倍数）；用显式栈代替递归，
+    numba的cache=True无法可靠缓存递归函数。
+    """
+    if n <= 128:
+        return _block_sum(values, 0, n)
+    stack_lo = np.zeros(64, dtype=np.int64)
+    stack_n = np.zeros(64, dtype=np.int64)
+    stack_stage = np.zeros(64, dtype=np.int64)
+    stack_left = np.zeros(64, dtype=np.float64)
+    stack_n[0] = n
+    top = 0
+    ret = 0.0
+    while True:
+        lo = stack_lo[top]
+        size = stack_n[top]
+        n2 = size // 2
+        n2 -= n2 % 8
+        stage = stack_stage[top]
+        if stage == 0:
+            # 左半
+            stack_stage[top] = 1
+            if n2 <= 128:
+                ret = _block_sum(values, lo, n2)
+            else:
+                top += 1
+                stack_lo[top] = lo
+                stack_n[top] = n2
+                stack_stage[top] = 0
+        elif stage == 1:
+            # 右半
+            stack_left[top] = ret
+            stack_stage[top] = 2
+            if size - n2 <= 128:
+                ret = _block_sum(values, lo + n2, size - n2)
+            else:
+                top += 1
+                stack_lo[top] = lo + n2
+                stack_n[top] = size - n2
+                stack_stage[top] = 0
+        else:
+            ret = stack_left[top] + ret
+            top -= 1
+            if top < 0:
+                return ret
+
+
+def _is_sep(c: int) -> bool:
+    # 逗号、分号、空格、\t、\n、\r
+    return c == 44 or c == 59 or c == 32 or c == 9 or c == 10 or c == 13
+
+
+def _mean_csv_floats(buf: np.ndarray, offsets: np.ndarray, out: np.ndarray, deferred: np.ndarray) -> None:
+    """
+    逐字节扫描原始值字符串，解析其中的浮点数并写入每行均值
+
+    仅处理"符号+数字+小数点+指数"形式且可精确换算的片段；遇到其他字符（nan/inf、'1.2.3'、
+    日期等）或超出精确范围的数字时将该行标记为deferred，由_mean_of_raw_text按float()语义处理。
+    安装numba时编译为并行本地代码，否则按纯Python执行。
+
+    Args:
+        buf: 所有字符串拼接后的UTF-8字节（uint8）
+        offsets: 第i行字符串为buf[offsets[i]:offsets[i+1]]
+        out: 输出的均值数组
+        deferred: 输出的回退标记
+    """
+    for i in prange(len(out)):
+        start = offsets[i]
+        end = offsets[i + 1]
+        values = np.empty((end - start) // 2 + 1, dtype=np.float64)
+        count = 0
+        ok = True
+        pos = start
+        while pos < end:
+            if _is_sep(buf[pos]):
+                pos += 1
+                continue
+            negative = False
+            if buf[pos] == 43 or buf[pos] == 45:
+                negative = buf[pos] == 45
+                pos += 1
+            mantissa = 0
+            digits = 0
+            scale = 0
+            while pos < end and 48 <= buf[pos] <= 57:
+                mantissa = mantissa * 10 + (int(buf[pos]) - 48)
+                digits += 1
+                pos += 1
+                if digits > 18:
+                    break
+            if pos < end and buf[pos] == 46:
+                pos += 1
+                while pos < end and 48 <= buf[pos] <= 57:
+                    mantissa = mantissa * 10 + (int(buf[pos]) - 48)
+                    digits += 1
+                    scale -= 1
+                    pos += 1
+                    if digits > 18:
+                        break
+            if digits == 0 or digits > 18:
+                ok = False
+                break
+            if pos < end and (buf[pos] == 101 or buf[pos] == 69):
+                pos += 1
+                exp_negative = False
+                if pos < end and (buf[pos] == 43 or buf[pos] == 45):
+                    exp_negative = buf[pos] == 45
+                    pos += 1
+                exp = 0
+                exp_digits = 0
+                while pos < end and 48 <= buf[pos] <= 57 and exp_digits < 4:
+                    exp = exp * 10 + (int(buf[pos]) - 48)
+                    exp_digits += 1
+                    pos += 1
+                if exp_digits == 0:
+                    ok = False
+                    break
+                scale += -exp if exp_negative else exp
+            # 数字后必须紧跟分隔符或字符串结尾，且尾数与10的幂都可精确表示
+            if (pos < end and not _is_sep(buf[pos])) or mantissa > _MAX_EXACT_MANTISSA or abs(scale) > 22:
+                ok = False
+                break
+            value = mantissa * _POW10[scale] if scale >= 0 else mantissa / _POW10[-scale]
+            values[count] = -value if negative else value
+            count += 1
+        deferred[i] = not ok
+        out[i] = _pairwise_sum(values, count) / count if ok and count > 0 else np.nan
+
+
+if njit is not None:
+    _block_sum = njit(cache=True)(_block_sum)
+    _pairwise_sum = njit(cache=True)(_pairwise_sum)
+    _is_sep = njit(cache=True)(_is_sep)
+    _mean_csv_floats = njit(parallel=True, cache=True)(_mean_csv_floats)
+
+
+def _mean_by_kernel(texts: list) -> np.ndarray:
+    """
+    用_mean_csv_floats批量求均值，回退行再按float()语义逐行解析
+
+    Args:
+        texts: 原始值字符串列表
+
+    Returns:
+        逐行均值数组
+    """
+    encoded = [text.encode('utf-8') for text in texts]
+    buf = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    out = np.empty(len(encoded), dtype=np.float64)
+    deferred = np.zeros(len(encoded), dtype=np.bool_)
+    _mean_csv_floats(buf, offsets, out, deferred)
+    for i in np.flatnonzero(deferred):
+        out[i] = _mean_of_raw_text(texts[i])
+    return out
+
+
+def mean_of_raw_values(raw: pd.Series) -> np.ndarray:
+    """
+    将逗号（或分号、空白）分隔的原始测量值按行求均值
+
+    安装numba时整列交给编译后的_mean_csv_floats处理，否则逐行按float()解析；两条路径结果逐位一致。
+
+    Args:
+        raw: 原始值列
+
+    Returns:
+        与raw逐行对应的均值数组，无有效值或含非法片段时为NaN
+    """
+    texts = raw.fillna('').astype(str).tolist()
+    if njit is None:
+        return np.array([_mean_of_raw_text(text) for text in texts], dtype=np.float64)
+    return _mean_by_kernel(texts)
@@ -1,11 +1,30 @@
 """列重命名映射器 - 参考RenameColProcessor逻辑"""
-from typing import Dict, Any
+import asyncio
+import os
+import re
+from typing import Dict, Any, Tuple
+import numpy as np
 import pandas as pd
 from utils.logger import get_logger
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+try:
+    import dask
+    import dask.dataframe as dd
+except ImportError:
+    dask = None
+    dd = None
 from .base_mapper import BaseMapper, MapperFactory
+from .raw_value import mean_of_raw_values
 
 logger = get_logger(__name__)
 
+_POLISH_MODULE_RE = re.compile(r'(Polish[ABCD])', re.IGNORECASE)
+_POLISH_CATEGORIES = ['AB', 'CD']
+_ENGINES = ('pandas', 'polars', 'dask')
+
 
 class ColumnRenameMapper(BaseMapper):
     """
@@ -29,6 +48,15 @@ class ColumnRenameMapper(BaseMapper):
         
         # 从数据库或配置加载para_info
         self.para_info = self._load_para_info()
+        
+        # para_info加载后不再变化，预先构建P1/P2重命名映射
+        self._p1_rename, self._p2_rename = self._build_rename_dicts()
+        
+        # 处理引擎：pandas（默认）、polars或dask（超出单机内存的大数据量）
+        self.engine = self.config.get('engine', 'pandas')
+        if self.engine not in _ENGINES:
+            raise ValueError(f"未知的engine: {self.engine!r}，可选 {_ENGINES}")
+        self.dask_npartitions = self.config.get('dask_npartitions', max(2, os.cpu_count() or 1))
     
     def _load_para_info(self) -> pd.DataFrame:
         """
@@ -54,6 +82,32 @@ class ColumnRenameMapper(BaseMapper):
             logger.error(f"加载para_info失败: {e}")
             return pd.DataFrame(columns=['PARA_NAME_WITH_CODE', 'FROM_SRC_FIELD', 'PARA_NAME'])
     
+    def _build_rename_dicts(self) -> Tuple[Dict[str, str], Dict[str, str]]:
+        """
+        根据para_info构建P1、P2列重命名映射
+        
+        Returns:
+            (P1映射, P2映射)，键为FROM_SRC_FIELD，值为PARA_NAME_WITH_CODE
+        """
+        if self.para_info.empty:
+            return {}, {}
+        
+        try:
+            para_name = self.para_info['PARA_NAME_WITH_CODE']
+            src_field = self.para_info['FROM_SRC_FIELD']
+            has_src = src_field.notna()
+            
+            p1_mask = para_name.str.contains('P1_', regex=False, na=False) & has_src
+            p2_mask = para_name.str.contains('P2_', regex=False, na=False) & has_src
+            
+            return (
+                dict(zip(src_field[p1_mask].tolist(), para_name[p1_mask].tolist())),
+                dict(zip(src_field[p2_mask].tolist(), para_name[p2_mask].tolist())),
+            )
+        except Exception as e:
+            logger.error(f"构建列重命名映射失败: {e}")
+            return {}, {}
+    
     async def process(self, data: pd.DataFrame) -> pd.DataFrame:
         """
         处理数据：重命名列并合并模块
@@ -71,28 +125,42 @@ class ColumnRenameMapper(BaseMapper):
             logger.warning("缺少MODULE列，跳过重命名处理")
             return data
         
-        # 拆分不同模块的数据
-        module_series = data["MODULE"].fillna("").astype(str)
+        if self.engine == 'polars':
+            return self._process_polars(data)
+        
+        if self.engine == 'dask':
+            return self._process_dask(data)
         
-        df_PolishA = data[module_series.str.contains("PolishA", case=False, na=False)].copy()
-        df_PolishB = data[module_series.str.contains("PolishB", case=False, na=False)].copy()
-        df_PolishC = data[module_series.str.contains("PolishC", case=False, na=False)].copy()
-        df_PolishD = data[module_series.str.contains("PolishD", case=False, na=False)].copy()
+        # 拆分不同模块的数据（单次提取模块标识后分组）
+        module_key = self._polish_module_key(data["MODULE"])
+        
+        # 分组时只选取MODULE以外的列，各模块切片本身即为新对象，无需整表drop或copy
+        keep_cols = [col for col in data.columns if col != "MODULE"]
+        groups = dict(tuple(data.groupby(module_key, sort=False)[keep_cols]))
+        empty = data.iloc[:0][keep_cols]
+        
+        df_PolishA = groups.get("POLISHA", empty)
+        df_PolishB = groups.get("POLISHB", empty)
+        df_PolishC = groups.get("POLISHC", empty)
+        df_PolishD = groups.get("POLISHD", empty)
         
         logger.info(
             f"拆分模块数据 - A:{len(df_PolishA)}, B:{len(df_PolishB)}, "
             f"C:{len(df_PolishC)}, D:{len(df_PolishD)}"
         )
         
-        # 删除MODULE列
-        for df in (df_PolishA, df_PolishB, df_PolishC, df_PolishD):
-            df.drop(columns=["MODULE"], inplace=True, errors="ignore")
-        
         # 重命名列
-        df_polishA_renamed = await self._rename_columns_polishAC(df_PolishA)
-        df_polishB_renamed = await self._rename_columns_polishBD(df_PolishB)
-        df_polishC_renamed = await self._rename_columns_polishAC(df_PolishC)
-        df_polishD_renamed = await self._rename_columns_polishBD(df_PolishD)
+        (
+            df_polishA_renamed, 
+            df_polishB_renamed, 
+            df_polishC_renamed, 
+            df_polishD_renamed
+        ) = await asyncio.gather(
+            self._rename_columns_polishAC(df_PolishA), 
+            self._rename_columns_polishBD(df_PolishB), 
+            self._rename_columns_polishAC(df_PolishC), 
+            self._rename_columns_polishBD(df_PolishD)
+        )
         
         # B和D删除基础列（避免合并时重复）
         df_polishB_renamed = df_polishB_renamed.drop(columns=self.base_col, errors='ignore')
@@ -108,7 +176,9 @@ class ColumnRenameMapper(BaseMapper):
                 on='WAFER_ID', 
                 how='inner'
             )
-            df_PolishAB['POLISH'] = 'AB'
+            df_PolishAB['POLISH'] = pd.Categorical.from_codes(
+                np.zeros(len(df_PolishAB), dtype=np.int8), categories=_POLISH_CATEGORIES
+            )
             result_dfs.append(df_PolishAB)
             logger.info(f"合并AB模块: {len(df_PolishAB)} 行")
         
@@ -119,7 +189,9 @@ class ColumnRenameMapper(BaseMapper):
                 on='WAFER_ID', 
                 how='inner'
             )
-            df_PolishCD['POLISH'] = 'CD'
+            df_PolishCD['POLISH'] = pd.Categorical.from_codes(
+                np.ones(len(df_PolishCD), dtype=np.int8), categories=_POLISH_CATEGORIES
+            )
             result_dfs.append(df_PolishCD)
             logger.info(f"合并CD模块: {len(df_PolishCD)} 行")
         
@@ -133,6 +205,130 @@ class ColumnRenameMapper(BaseMapper):
         
         return merged
     
+    def _process_polars(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        使用Polars LazyFrame完成拆分、重命名、合并，整个流程一次collect
+        
+        Args:
+            data: 输入数据（需包含MODULE列）
+            
+        Returns:
+            重命名并合并后的数据
+        """
+        if pl is None:
+            raise ImportError("engine='polars' 需要安装polars")
+        
+        # 列名映射在pandas侧预先算好：P1/P2重命名、B/D删除基础列、重名列加_x/_y后缀
+        cols = [col for col in data.columns if col not in ("MODULE", "WAFER_ID")]
+        p1_names = {col: self._p1_rename.get(col, col) for col in cols}
+        p2_names = {col: self._p2_rename.get(col, col) for col in cols}
+        p2_names = {col: name for col, name in p2_names.items() if name not in self.base_col}
+        overlap = set(p1_names.values()) & set(p2_names.values())
+        
+        left_exprs = [pl.col('WAFER_ID')] + [
+            pl.col(col).alias(f'{name}_x' if name in overlap else name) for col, name in p1_names.items()
+        ]
+        right_exprs = [pl.col('WAFER_ID')] + [
+            pl.col(col).alias(f'{name}_y' if name in overlap else name) for col, name in p2_names.items()
+        ]
+        
+        # MODULE可能为混合类型的object列，先统一为字符串再转换
+        data = data.assign(MODULE=data["MODULE"].fillna("").astype(str))
+        lf = pl.from_pandas(data).lazy().with_columns(
+            pl.col('MODULE').cast(pl.String).str.extract(r'(?i)(Polish[ABCD])', 1).str.to_uppercase().alias('MODULE')
+        )
+        
+        def polish(letter: str, exprs: list) -> 'pl.LazyFrame':
+            return lf.filter(pl.col('MODULE') == f'POLISH{letter}').select(exprs)
+        
+        lf_ab = polish('A', left_exprs).join(
+            polish('B', right_exprs), on='WAFER_ID', how='inner', nulls_equal=True, maintain_order='left'
+        ).with_columns(pl.lit('AB', dtype=pl.Enum(_POLISH_CATEGORIES)).alias('POLISH'))
+        lf_cd = polish('C', left_exprs).join(
+            polish('D', right_exprs), on='WAFER_ID', how='inner', nulls_equal=True, maintain_order='left'
+        ).with_columns(pl.lit('CD', dtype=pl.Enum(_POLISH_CATEGORIES)).alias('POLISH'))
+        
+        merged = pl.concat([lf_ab, lf_cd], how='vertical').collect(engine='streaming')
+        
+        if merged.is_empty():
+            logger.warning("没有可合并的模块数据")
+            return pd.DataFrame()
+        
+        merged = merged.to_pandas()
+        # pl.Enum转换后为有序Categorical，与pandas/dask引擎保持一致改为无序
+        merged["POLISH"] = pd.Categorical(merged["POLISH"], categories=_POLISH_CATEGORIES, ordered=False)
+        logger.info(f"列重命名完成(polars)，输出: {merged.shape}")
+        
+        return merged
+    
+    def _process_dask(self, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        使用Dask DataFrame分区执行拆分、重命名、合并，整个流程一次compute
+        
+        按WAFER_ID列做哈希合并（不set_index，避免提前计算分区边界），
+        compute后按输入行号还原与pandas引擎相同的行顺序
+        
+        Args:
+            data: 输入数据（需包含MODULE列）
+            
+        Returns:
+            重命名并合并后的数据
+        """
+        if dd is None:
+            raise ImportError("engine='dask' 需要安装dask[dataframe]")
+        
+        cols = [col for col in data.columns if col != "MODULE"]
+        p1_rename = {col: name for col, name in self._p1_rename.items() if col in cols}
+        p2_rename = {col: name for col, name in self._p2_rename.items() if col in cols}
+        
+        def polish(ddf, letter: str, rename_dict: Dict[str, str], drop_base: bool):
+            part = ddf[ddf["MODULE"] == f"POLISH{letter}"].drop(columns=["MODULE"]).rename(columns=rename_dict)
+            if drop_base:
+                part = part.drop(columns=[col for col in self.base_col if col in part.columns])
+            return part
+        
+        def merge_pair(left, right, polish_name: str):
+            # 两侧的_row合并后为_row_x/_row_y，用于还原pandas合并的行顺序
+            return left.merge(right, on="WAFER_ID", how="inner").assign(POLISH=polish_name)
+        
+        # 关闭dask的string[pyarrow]自动转换，保持与pandas引擎相同的列类型
+        with dask.config.set({"dataframe.convert-string": False}):
+            ddf = dd.from_pandas(data.assign(_row=np.arange(len(data))), npartitions=self.dask_npartitions)
+            ddf = ddf.assign(MODULE=ddf["MODULE"].map_partitions(self._polish_module_key, meta=("MODULE", "object")))
+            
+            ddf_ab = merge_pair(polish(ddf, "A", p1_rename, False), polish(ddf, "B", p2_rename, True), "AB")
+            ddf_cd = merge_pair(polish(ddf, "C", p1_rename, False), polish(ddf, "D", p2_rename, True), "CD")
+            
+            merged = dd.concat([ddf_ab, ddf_cd]).compute()
+        
+        if merged.empty:
+            logger.warning("没有可合并的模块数据")
+            return pd.DataFrame()
+        
+        # 哈希合并会打乱行顺序：AB在前、CD在后，各自按左侧再按右侧的输入行号排列
+        merged = (
+            merged.sort_values(["POLISH", "_row_x", "_row_y"], kind="stable")
+            .drop(columns=["_row_x", "_row_y"])
+            .reset_index(drop=True)
+        )
+        merged["POLISH"] = pd.Categorical(merged["POLISH"], categories=_POLISH_CATEGORIES)
+        logger.info(f"列重命名完成(dask)，输出: {merged.shape}")
+        
+        return merged
+    
+    @staticmethod
+    def _polish_module_key(module: pd.Series) -> pd.Series:
+        """
+        从MODULE列提取模块标识（POLISHA/B/C/D），无法识别时为NaN
+        
+        Args:
+            module: MODULE列
+            
+        Returns:
+            大写的模块标识
+        """
+        return module.fillna("").astype(str).str.extract(_POLISH_MODULE_RE, expand=False).str.upper()
+    
     async def _rename_columns_polishAC(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         重命名PolishA/C的列（映射到P1前缀）
@@ -143,17 +339,13 @@ class ColumnRenameMapper(BaseMapper):
         Returns:
             重命名后的DataFrame
         """
-        if df.empty or self.para_info.empty:
+        if df.empty or not self._p1_rename:
             return df
         
         try:
-            rename_map = self.para_info[['PARA_NAME_WITH_CODE', 'FROM_SRC_FIELD']]
-            P1_mapping = rename_map[rename_map['PARA_NAME_WITH_CODE'].str.contains('P1_', na=False)]
-            P1_mapping = P1_mapping.dropna(subset=['FROM_SRC_FIELD'])
-            rename_dict = dict(zip(P1_mapping['FROM_SRC_FIELD'], P1_mapping['PARA_NAME_WITH_CODE']))
-            
-            df = df.rename(columns=rename_dict)
-            logger.debug(f"P1列重命名: {len(rename_dict)} 个列")
+            # 整体替换列名，宽表下比rename(columns=dict)快得多；set_axis返回新对象，不修改入参
+            df = df.set_axis([self._p1_rename.get(col, col) for col in df.columns], axis=1)
+            logger.debug(f"P1列重命名: {len(self._p1_rename)} 个列")
             
         except Exception as e:
             logger.error(f"P1列重命名失败: {e}")
@@ -170,17 +362,13 @@ class ColumnRenameMapper(BaseMapper):
         Returns:
             重命名后的DataFrame
         """
-        if df.empty or self.para_info.empty:
+        if df.empty or not self._p2_rename:
             return df
         
         try:
-            rename_map = self.para_info[['PARA_NAME_WITH_CODE', 'FROM_SRC_FIELD']]
-            P2_mapping = rename_map[rename_map['PARA_NAME_WITH_CODE'].str.contains('P2_', na=False)]
-            P2_mapping = P2_mapping.dropna(subset=['FROM_SRC_FIELD'])
-            rename_dict = dict(zip(P2_mapping['FROM_SRC_FIELD'], P2_mapping['PARA_NAME_WITH_CODE']))
-            
-            df = df.rename(columns=rename_dict)
-            logger.debug(f"P2列重命名: {len(rename_dict)} 个列")
+            # 整体替换列名，宽表下比rename(columns=dict)快得多；set_axis返回新对象，不修改入参
+            df = df.set_axis([self._p2_rename.get(col, col) for col in df.columns], axis=1)
+            logger.debug(f"P2列重命名: {len(self._p2_rename)} 个列")
             
         except Exception as e:
             logger.error(f"P2列重命名失败: {e}")
@@ -201,16 +389,9 @@ class ColumnRenameMapper(BaseMapper):
             return df
         
         try:
-            df['PRE_VALUE_LIST'] = df['PRE_GLB_RAW_VALUE'].fillna('').str.split(',')
-            df['PRE_VALUE_LIST'] = df['PRE_VALUE_LIST'].apply(lambda x: [float(i) for i in x if i != ''])
-
-            df['PST_VALUE_LIST'] = df['PST_GLB_RAW_VALUE'].fillna('').str.split(',')
-            df['PST_VALUE_LIST'] = df['PST_VALUE_LIST'].apply(lambda x: [float(i) for i in x if i != ''])
-
-            df['PRE_GLB_STI_THK_70000'] = df['PRE_VALUE_LIST'].apply(lambda x: np.mean(x) if x else np.nan)
-            df['PST_GLB_CMP_THK_80000'] = df['PST_VALUE_LIST'].apply(lambda x: np.mean(x) if x else np.nan)
+            df['PRE_GLB_STI_THK_70000'] = mean_of_raw_values(df['PRE_GLB_RAW_VALUE'])
+            df['PST_GLB_CMP_THK_80000'] = mean_of_raw_values(df['PST_GLB_RAW_VALUE'])
             
-            df = df.drop(columns=['PRE_VALUE_LIST', 'PST_VALUE_LIST'], errors='ignore')
             logger.debug(f"PRE_GLB_STI_THK_70000和PST_GLB_CMP_THK_80000计算完成")
             return df
         except Exception as e:
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# raw_value不依赖包内其他模块，测试时直接从仓库根目录导入
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import raw_value
+
+
+def _kernel_means(texts, compiled=True):
+    kernel = raw_value._mean_csv_floats if compiled else getattr(raw_value._mean_csv_floats, 'py_func', raw_value._mean_csv_floats)
+    encoded = [text.encode('utf-8') for text in texts]
+    buf = np.frombuffer(b''.join(encoded), dtype=np.uint8)
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(item) for item in encoded], out=offsets[1:])
+    out = np.empty(len(encoded), dtype=np.float64)
+    deferred = np.zeros(len(encoded), dtype=np.bool_)
+    kernel(buf, offsets, out, deferred)
+    for i in np.flatnonzero(deferred):
+        out[i] = raw_value._mean_of_raw_text(texts[i])
+    return out
+
+
+@pytest.fixture(params=[True, False], ids=['compiled', 'python'])
+def kernel_means(request):
+    return lambda texts: _kernel_means(texts, compiled=request.param)
+
+
+@pytest.mark.parametrize('text', ['1.2.3', '1e', '2023-01-05', '1,nan', '1;nan', 'x', '.', '-', '2e,4'])
+def test_invalid_token_gives_nan(kernel_means, text):
+    assert np.isnan(kernel_means([text])[0])
+    assert np.isnan(raw_value._mean_of_raw_text(text))
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('1,2,3', 2.0),
+    ('4, 5,', 4.5),
+    ('1;2;3', 2.0),
+    ('1 2,  3e1', 11.0),
+    ('.5,-.5,+2', 2 / 3),
+    ('1e-1;2E+1', 10.05),
+    ('1,inf', np.inf),
+])
+def test_valid_rows(kernel_means, text, expected):
+    assert kernel_means([text])[0] == expected
+
+
+@pytest.mark.parametrize('text', ['', ' , ,', ';'])
+def test_empty_rows_give_nan(kernel_means, text):
+    assert np.isnan(kernel_means([text])[0])
+
+
+def test_correctly_rounded(kernel_means):
+    assert kernel_means(['0.1;0.7'])[0] == np.mean([0.1, 0.7])
+
+
+def test_matches_np_mean_for_any_separator(kernel_means):
+    rng = np.random.default_rng(0)
+    rows = [
+        [f'{x:.{rng.integers(1, 8)}f}' for x in rng.uniform(-1000, 1000, rng.integers(1, 300))]
+        for _ in range(500)
+    ]
+    expected = np.array([np.mean([float(token) for token in row]) for row in rows])
+    np.testing.assert_array_equal(kernel_means([','.join(row) for row in rows]), expected)
+    np.testing.assert_array_equal(kernel_means(['; '.join(row) for row in rows]), expected)
+
+
+def test_out_of_range_numbers_deferred_to_float(kernel_means):
+    texts = ['12345678901234567890,1', '1e400', '1e-30,2', '1_000', '１,2']
+    expected = [np.mean([float(token) for token in raw_value._RAW_SEP_RE.split(text)]) for text in texts]
+    np.testing.assert_array_equal(kernel_means(texts), expected)
+
+
+@pytest.mark.parametrize('n', [0, 1, 7, 8, 9, 127, 128, 129, 257, 1029, 5000])
+def test_pairwise_sum_matches_numpy(n):
+    values = np.random.default_rng(n).uniform(-1, 1, n)
+    assert raw_value._pairwise_sum(values, n) == np.add.reduce(values)
+
+
+@pytest.fixture(params=[True, False], ids=['kernel', 'python'])
+def use_kernel(request, monkeypatch):
+    if not request.param:
+        monkeypatch.setattr(raw_value, 'njit', None)
+    return request.param
+
+
+def test_mean_of_raw_values(use_kernel):
+    raw = pd.Series(['1,2,3', None, '', '0.1;0.7', '1,nan', '2023-01-05', '4, 5,'], index=[5, 3, 1, 0, 2, 4, 6])
+    np.testing.assert_array_equal(
+        raw_value.mean_of_raw_values(raw),
+        [2.0, np.nan, np.nan, np.mean([0.1, 0.7]), np.nan, np.nan, 4.5],
+    )
+
+
+def test_mean_of_raw_values_empty(use_kernel):
+    assert raw_value.mean_of_raw_values(pd.Series([], dtype=object)).shape == (0,)